@@ -8,21 +8,72 @@ Firestore database to help understand the data model for creating new databases.
 SAFETY FEATURES:
 - Read-only operations only
 - No write capabilities 
-- Exports to local JSON files
+- Exports to local JSON files (optionally gzip-compressed)
 - Sample data only (configurable limits)
 """
 
-import json
+import gzip
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import firebase_admin
+import orjson
 from firebase_admin import credentials, firestore
 from google.cloud.firestore_v1 import DocumentSnapshot
 
+# Pretty-printed output; datetimes are routed through _serialize_firestore_value
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME
+
+# Field holding the raw JSON bytes of documents imported from opaque collections
+OPAQUE_FIELD = "_raw"
+
+
+def _serialize_firestore_value(value: Any) -> Any:
+    """Convert Firestore types orjson cannot serialize natively to JSON-compatible types."""
+    if hasattr(value, 'timestamp'):  # Firestore timestamp
+        return value.timestamp()
+    if hasattr(value, 'id'):  # Document reference
+        return f"ref:{value.id}"
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _dump_json(data: Any) -> bytes:
+    """Serialize exported data to pretty-printed UTF-8 JSON."""
+    return orjson.dumps(data, default=_serialize_firestore_value, option=JSON_OPTIONS)
+
+
+def _splice_json_object(fields: Dict[str, bytes]) -> bytes:
+    """Assemble a pretty-printed JSON object from already-serialized field values.
+    
+    Produces the same bytes as serializing the whole object with _dump_json, but
+    without traversing the values again: nested blocks are only re-indented.
+    """
+    if not fields:
+        return b'{}'
+    # Raw newlines only occur between tokens (they are escaped inside strings)
+    members = [
+        b'\n  ' + orjson.dumps(key) + b': ' + blob.replace(b'\n', b'\n  ')
+        for key, blob in fields.items()
+    ]
+    return b'{' + b','.join(members) + b'\n}'
+
+
+def _write_json(path: Path, payload: bytes, compress: bool = False) -> Path:
+    """Write serialized JSON to a file, gzip-compressed to <path>.gz if requested."""
+    if compress:
+        path = path.with_name(path.name + '.gz')
+        # Level 1 keeps CPU cost low; repeated field names still compress well
+        with gzip.open(path, 'wb', compresslevel=1) as f:
+            f.write(payload)
+    else:
+        with open(path, 'wb') as f:
+            f.write(payload)
+    return path
+
 
 class FirestoreExporter:
     """Safe read-only Firestore database exporter."""
@@ -46,33 +97,24 @@ class FirestoreExporter:
                 'projectId': self.project_id,
             })
         
+        # Shared by all export worker threads over one multiplexed gRPC channel
         self.db = firestore.client()
         print(f"✅ Connected to Firestore project: {self.project_id}")
     
     def _document_to_dict(self, doc: DocumentSnapshot) -> Dict[str, Any]:
-        """Convert Firestore document to dictionary, handling special types."""
+        """Convert Firestore document to dictionary.
+        
+        Special types (timestamps, references) are left as-is and converted
+        by _serialize_firestore_value when the data is written out. Documents
+        stored as raw JSON bytes by an opaque import are decoded back as-is.
+        """
         if not doc.exists:
             return {}
             
-        data = doc.to_dict()
-        if not data:
-            return {}
-            
-        # Convert Firestore types to JSON-serializable types
-        return self._serialize_firestore_data(data)
-    
-    def _serialize_firestore_data(self, data: Any) -> Any:
-        """Recursively serialize Firestore data types to JSON-compatible types."""
-        if isinstance(data, dict):
-            return {key: self._serialize_firestore_data(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self._serialize_firestore_data(item) for item in data]
-        elif hasattr(data, 'timestamp'):  # Firestore timestamp
-            return data.timestamp()
-        elif hasattr(data, 'id'):  # Document reference
-            return f"ref:{data.id}"
-        else:
-            return data
+        data = doc.to_dict() or {}
+        if len(data) == 1 and isinstance(data.get(OPAQUE_FIELD), bytes):
+            return orjson.loads(data[OPAQUE_FIELD])
+        return data
     
     def get_collections(self) -> List[str]:
         """Get list of all collections in the database."""
@@ -81,47 +123,64 @@ class FirestoreExporter:
             collections.append(collection.id)
         return sorted(collections)
     
-    def export_collection_structure(self, collection_name: str, sample_limit: int = 5) -> Dict[str, Any]:
-        """Export collection structure with sample documents."""
+    def export_collection_structure(self, collection_name: str, sample_limit: int = 5,
+                                    structure_only: bool = False,
+                                    exported_at: Optional[str] = None) -> Dict[str, Any]:
+        """Export collection structure with sample documents.
+        
+        In structure-only mode, only sample document IDs are fetched (no field data).
+        exported_at defaults to the current time when not provided by the caller.
+        """
         print(f"📊 Analyzing collection: {collection_name}")
         
         collection_ref = self.db.collection(collection_name)
-        
-        # Get sample documents
-        docs = collection_ref.limit(sample_limit).stream()
         sample_docs = []
         
-        for doc in docs:
-            doc_data = self._document_to_dict(doc)
-            if doc_data:  # Only include non-empty documents
-                sample_docs.append({
-                    'id': doc.id,
-                    'data': doc_data
-                })
-        
-        # Get collection stats
+        # Get collection stats first
         try:
-            # This is a rough estimate - Firestore doesn't provide exact counts easily
-            all_docs = list(collection_ref.limit(100).stream())
-            estimated_count = len(all_docs)
-            if len(all_docs) == 100:
-                estimated_count = "100+"
+            # Server-side aggregation query: counts documents without streaming them
+            estimated_count = collection_ref.count().get()[0][0].value
         except Exception as e:
-            estimated_count = "unknown"
+            estimated_count = None
             print(f"⚠️  Could not get document count for {collection_name}: {e}")
         
+        # Empty collection: nothing to sample, skip the query entirely
+        if estimated_count != 0:
+            # Note: stream() issues a single server-streaming RunQuery RPC for the whole
+            # limit, so there is no page size to tune (unlike list_documents()).
+            if structure_only:
+                # Empty projection: the server returns document names only, no field payloads
+                docs = collection_ref.select([]).limit(sample_limit).stream()
+                for doc in docs:
+                    sample_docs.append({'id': doc.id})
+            else:
+                # Get sample documents
+                docs = collection_ref.limit(sample_limit).stream()
+                for doc in docs:
+                    doc_data = self._document_to_dict(doc)
+                    if doc_data:  # Only include non-empty documents
+                        sample_docs.append({
+                            'id': doc.id,
+                            'data': doc_data
+                        })
+        
         return {
             'collection_name': collection_name,
             'estimated_document_count': estimated_count,
             'sample_documents': sample_docs,
             'sample_count': len(sample_docs),
-            'exported_at': datetime.now().isoformat()
+            'exported_at': exported_at or datetime.now().isoformat()
         }
     
-    def export_database_structure(self, output_dir: str = "firestore_export", sample_limit: int = 5) -> Dict[str, Any]:
-        """Export entire database structure."""
+    def export_database_structure(self, output_dir: str = "firestore_export", sample_limit: int = 5,
+                                  max_workers: int = 8, structure_only: bool = False,
+                                  compress: bool = False) -> Dict[str, Any]:
+        """Export entire database structure, analyzing collections concurrently."""
         print(f"🚀 Starting database export to: {output_dir}")
         
+        # Single timestamp shared by every collection in this export
+        exported_at = datetime.now().isoformat()
+        
         # Create output directory
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
@@ -132,35 +191,55 @@ class FirestoreExporter:
         
         database_structure = {
             'project_id': self.project_id,
-            'exported_at': datetime.now().isoformat(),
+            'exported_at': exported_at,
             'total_collections': len(collections),
             'collections': {}
         }
         
-        # Export each collection
-        for collection_name in collections:
-            try:
-                collection_data = self.export_collection_structure(collection_name, sample_limit)
-                database_structure['collections'][collection_name] = collection_data
-                
-                # Save individual collection file
-                collection_file = output_path / f"{collection_name}.json"
-                with open(collection_file, 'w', encoding='utf-8') as f:
-                    json.dump(collection_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"✅ Exported {collection_name} ({collection_data['sample_count']} samples)")
-                
-            except Exception as e:
-                print(f"❌ Error exporting {collection_name}: {e}")
-                database_structure['collections'][collection_name] = {
-                    'error': str(e),
-                    'exported_at': datetime.now().isoformat()
-                }
+        # Export collections in parallel - each export is dominated by Firestore network I/O
+        exported_collections = {}
+        # Serialized collection files, reused when writing the complete structure file
+        collection_blobs: Dict[str, bytes] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.export_collection_structure, collection_name, sample_limit, structure_only, exported_at
+                ): collection_name
+                for collection_name in collections
+            }
+            
+            for future in as_completed(futures):
+                collection_name = futures[future]
+                try:
+                    collection_data = future.result()
+                    exported_collections[collection_name] = collection_data
+                    
+                    # Save individual collection file
+                    collection_blob = _dump_json(collection_data)
+                    _write_json(output_path / f"{collection_name}.json", collection_blob, compress)
+                    collection_blobs[collection_name] = collection_blob
+                    
+                    print(f"✅ Exported {collection_name} ({collection_data['sample_count']} samples)")
+                    
+                except Exception as e:
+                    print(f"❌ Error exporting {collection_name}: {e}")
+                    exported_collections[collection_name] = {
+                        'error': str(e),
+                        'exported_at': exported_at
+                    }
+        
+        # Keep collections in sorted order regardless of completion order
+        database_structure['collections'] = {name: exported_collections[name] for name in collections}
         
         # Save complete database structure
-        complete_file = output_path / "complete_database_structure.json"
-        with open(complete_file, 'w', encoding='utf-8') as f:
-            json.dump(database_structure, f, indent=2, ensure_ascii=False)
+        # Splice the per-collection bytes into the combined file instead of re-serializing them
+        collections_blob = _splice_json_object({
+            name: collection_blobs.get(name) or _dump_json(exported_collections[name])
+            for name in collections
+        })
+        structure_blobs = {key: _dump_json(value) for key, value in database_structure.items() if key != 'collections'}
+        structure_blobs['collections'] = collections_blob
+        _write_json(output_path / "complete_database_structure.json", _splice_json_object(structure_blobs), compress)
         
         print(f"🎉 Database export completed! Files saved to: {output_path.absolute()}")
         return database_structure
@@ -192,10 +271,16 @@ def main():
         # Export database
         sample_limit = int(os.getenv("SAMPLE_LIMIT", "5"))
         output_dir = os.getenv("OUTPUT_DIR", "firestore_export")
+        max_workers = int(os.getenv("EXPORT_WORKERS", "8"))
+        structure_only = os.getenv("STRUCTURE_ONLY", "false").lower() == "true"
+        compress = os.getenv("COMPRESS_OUTPUT", "false").lower() == "true"
         
         database_structure = exporter.export_database_structure(
             output_dir=output_dir,
-            sample_limit=sample_limit
+            sample_limit=sample_limit,
+            max_workers=max_workers,
+            structure_only=structure_only,
+            compress=compress
         )
         
         print("\n📊 Export Summary:")
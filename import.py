@@ -2,8 +2,8 @@
 """
 Mantra Finance Database Importer
 
-This script imports collections from JSON files in the firestore_import folder
-to a specified Firestore database.
+This script imports collections from JSON files (optionally gzip-compressed)
+in the firestore_import folder to a specified Firestore database.
 
 ENVIRONMENT VARIABLES:
 - FIREBASE_PROJECT_ID: Target Firebase project ID
@@ -11,6 +11,10 @@ ENVIRONMENT VARIABLES:
 - FIREBASE_DATABASE_NAME: Database name (optional, defaults to "(default)")
 - IMPORT_DIR: Directory containing JSON files (optional, defaults to "firestore_import")
 - DRY_RUN: Set to "true" for dry-run mode (optional, defaults to "false")
+- IMPORT_WORKERS: Number of write batches committed concurrently, 1-50 (optional, defaults to 1;
+  raise gradually, following Firestore's 500/50/5 ramp-up rule)
+- OPAQUE_COLLECTIONS: Comma-separated collections stored as raw JSON bytes in a "_raw" field (optional)
+- LOG_LEVEL: Set to "DEBUG" to log every imported document (optional, defaults to "INFO")
 
 SAFETY FEATURES:
 - Production service account protection
@@ -20,27 +24,115 @@ SAFETY FEATURES:
 - Detailed logging
 """
 
-import json
+import gzip
+import logging
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
 
 import firebase_admin
+import ijson
+import orjson
 from firebase_admin import credentials, firestore
 from google.cloud.firestore_v1 import DocumentReference
 
+# Maximum number of document references fetched per get_all() call
+EXISTENCE_CHECK_BATCH_SIZE = 300
+
+# Maximum number of writes per batch commit (Firestore limit is 500)
+WRITE_BATCH_SIZE = 500
+
+# Range of integers Firestore can store
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+# Upper bound for concurrent write batches. Every in-flight commit is one stream on
+# the client's single gRPC channel; this keeps them well below the ~100 concurrent
+# streams an HTTP/2 connection typically allows.
+MAX_IMPORT_WORKERS = 50
+
+# Recognized collection file extensions, in lookup order
+COLLECTION_FILE_EXTENSIONS = (".json", ".json.gz")
+
+# Field holding the raw JSON bytes of documents in opaque collections
+OPAQUE_FIELD = "_raw"
+
+# Number of documents between progress lines in dry-run mode
+PROGRESS_INTERVAL = 100
+
+# Per-document messages are logged at DEBUG to keep the write loop quiet
+log = logging.getLogger(__name__)
+
+
+def _open_collection_file(path: Path) -> BinaryIO:
+    """Open a collection file for binary reading, decompressing .json.gz files."""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _validate_document_data(data: Dict[str, Any]) -> bool:
+    """Check document data against Firestore's value rules without any RPC.
+    
+    Raises ValueError for data Firestore would reject. Returns whether the data
+    contains any serialized document reference ("ref:..." strings).
+    """
+    has_refs = False
+    stack: List[Any] = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if not key:
+                    raise ValueError("empty field name")
+                if key.startswith('__') and key.endswith('__'):
+                    raise ValueError(f"reserved field name {key!r}")
+                stack.append(item)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, list):
+                    raise ValueError("nested arrays are not supported")
+                stack.append(item)
+        elif isinstance(value, bool):
+            continue
+        elif isinstance(value, int):
+            if not INT64_MIN <= value <= INT64_MAX:
+                raise ValueError(f"integer {value} is out of 64-bit range")
+        elif isinstance(value, str) and value.startswith("ref:"):
+            has_refs = True
+    return has_refs
+
+
+def _has_sample_documents(path: Path) -> bool:
+    """Check that a collection file has a top-level 'sample_documents' key."""
+    with _open_collection_file(path) as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == '' and event == 'map_key' and value == 'sample_documents':
+                return True
+    return False
+
 
 class FirestoreImporter:
     """Safe Firestore database importer with safety checks."""
     
-    def __init__(self, service_account_path: str, project_id: str, dry_run: bool = False, database_name: str = "(default)"):
-        """Initialize the importer with Firebase credentials."""
+    def __init__(self, service_account_path: str, project_id: str, dry_run: bool = False, database_name: str = "(default)",
+                 max_workers: int = 1, opaque_collections: Optional[Set[str]] = None):
+        """Initialize the importer with Firebase credentials.
+        
+        Documents of opaque collections are stored as raw JSON bytes in a single
+        field instead of being converted field by field.
+        """
         self.project_id = project_id
         self.service_account_path = service_account_path
         self.dry_run = dry_run
         self.database_name = database_name
+        if not 1 <= max_workers <= MAX_IMPORT_WORKERS:
+            raise ValueError(f"IMPORT_WORKERS must be between 1 and {MAX_IMPORT_WORKERS}, got {max_workers}")
+        self.max_workers = max_workers
+        self.opaque_collections = opaque_collections or set()
         self.db: Any = None
         self._validate_service_account()
         self._init_firebase()
@@ -78,7 +170,10 @@ class FirestoreImporter:
             'projectId': self.project_id,
         })
         
-        # Connect to specific database
+        # Connect to specific database. A single client (one gRPC channel) is shared by
+        # all worker threads; HTTP/2 multiplexes their RPCs, and max_workers is capped at
+        # MAX_IMPORT_WORKERS, below the per-connection concurrent stream limit, so no
+        # channel pool is needed.
         if self.database_name == "(default)":
             self.db = firestore.client()
         else:
@@ -89,17 +184,73 @@ class FirestoreImporter:
         print(f"✅ Connected to Firestore project: {self.project_id}, {db_info} ({mode} mode)")
     
     def _deserialize_firestore_data(self, data: Any) -> Any:
-        """Convert JSON data back to Firestore-compatible types."""
-        if isinstance(data, dict):
-            return {key: self._deserialize_firestore_data(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self._deserialize_firestore_data(item) for item in data]
-        elif isinstance(data, str) and data.startswith("ref:"):
-            # Handle document references - this is a simplified version
-            # In a real scenario, you might want to create actual DocumentReference objects
-            return data  # Keep as string for now
-        else:
+        """Convert JSON data back to Firestore-compatible types, mutating containers in place."""
+        if not isinstance(data, (dict, list)):
             return data
+        
+        # Iterative walk avoids both recursion and rebuilding a copy of the tree
+        stack = [data]
+        while stack:
+            container = stack.pop()
+            items = container.items() if isinstance(container, dict) else enumerate(container)
+            for key, value in items:
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+                elif isinstance(value, str) and value.startswith("ref:"):
+                    # Handle document references - this is a simplified version
+                    # In a real scenario, you might want to create actual DocumentReference objects
+                    container[key] = value  # Keep as string for now
+        return data
+    
+    def _get_existing_paths(self, doc_refs: List[DocumentReference]) -> Tuple[Set[str], Set[str]]:
+        """Check which of the given document references already exist.
+        
+        Returns (existing paths, paths whose existence check failed).
+        """
+        existing = set()
+        failed = set()
+        for start in range(0, len(doc_refs), EXISTENCE_CHECK_BATCH_SIZE):
+            chunk = doc_refs[start:start + EXISTENCE_CHECK_BATCH_SIZE]
+            try:
+                chunk_existing = {snapshot.reference.path for snapshot in self.db.get_all(chunk) if snapshot.exists}
+            except Exception as e:
+                log.error("  ❌ Error checking existence of %d documents: %s", len(chunk), e)
+                failed.update(doc_ref.path for doc_ref in chunk)
+                continue
+            existing |= chunk_existing
+        return existing, failed
+    
+    def _commit_batch(self, pending_writes: List[Tuple[DocumentReference, Dict[str, Any]]]) -> Tuple[int, int]:
+        """Commit pending writes in a single atomic batch, returning (imported, errors) counts."""
+        batch = self.db.batch()
+        for doc_ref, doc_data in pending_writes:
+            batch.set(doc_ref, doc_data)
+        
+        try:
+            batch.commit()
+        except Exception as e:
+            # A batch is atomic: if the commit fails, none of its documents were written.
+            # Retry them one by one so only the documents that actually fail count as errors.
+            log.warning("  ⚠️  Batch of %d documents failed (%s), retrying individually", len(pending_writes), e)
+            return self._commit_individually(pending_writes)
+        
+        for doc_ref, _ in pending_writes:
+            log.debug("  ✅ Imported document: %s", doc_ref.id)
+        return len(pending_writes), 0
+    
+    def _commit_individually(self, pending_writes: List[Tuple[DocumentReference, Dict[str, Any]]]) -> Tuple[int, int]:
+        """Write documents one at a time, returning (imported, errors) counts."""
+        imported_count = 0
+        error_count = 0
+        for doc_ref, doc_data in pending_writes:
+            try:
+                doc_ref.set(doc_data)
+                imported_count += 1
+                log.debug("  ✅ Imported document: %s", doc_ref.id)
+            except Exception as e:
+                error_count += 1
+                log.error("  ❌ Error importing document %s: %s", doc_ref.id, e)
+        return imported_count, error_count
     
     def get_available_collections(self, import_dir: str = "firestore_import") -> List[str]:
         """Get list of available collections from JSON files in import directory."""
@@ -108,101 +259,230 @@ class FirestoreImporter:
         if not import_path.exists():
             raise FileNotFoundError(f"Import directory not found: {import_path}")
         
-        json_files = list(import_path.glob("*.json"))
-        
-        # Extract collection names from filenames (remove .json extension)
-        collections = []
-        for json_file in json_files:
-            # Skip the complete database structure file and import reports
-            if (json_file.name != "complete_database_structure.json" and 
-                not json_file.name.startswith("import_report_")):
-                collection_name = json_file.stem
-                collections.append(collection_name)
+        # Extract collection names from filenames (remove .json / .json.gz extension),
+        # skipping the complete database structure file and import reports
+        collections = set()
+        with os.scandir(import_path) as entries:
+            for entry in entries:
+                for extension in COLLECTION_FILE_EXTENSIONS:
+                    if entry.name.endswith(extension):
+                        collection_name = entry.name[:-len(extension)]
+                        if (collection_name != "complete_database_structure" and
+                                not collection_name.startswith("import_report_") and
+                                entry.is_file()):
+                            collections.add(collection_name)
+                        break
         
         return sorted(collections)
     
-    def load_collection_data(self, collection_name: str, import_dir: str = "firestore_import") -> Dict[str, Any]:
-        """Load collection data from JSON file."""
+    def _find_collection_file(self, collection_name: str, import_dir: str) -> Path:
+        """Locate the JSON file for a collection, preferring uncompressed over .json.gz."""
         import_path = Path(import_dir)
-        json_file = import_path / f"{collection_name}.json"
+        for extension in COLLECTION_FILE_EXTENSIONS:
+            json_file = import_path / f"{collection_name}{extension}"
+            if json_file.exists():
+                return json_file
         
-        if not json_file.exists():
-            raise FileNotFoundError(f"Collection file not found: {json_file}")
+        raise FileNotFoundError(f"Collection file not found: {import_path / f'{collection_name}.json'}")
+    
+    def _prepare_document(self, doc_info: Any, position: int) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Validate a sample document entry and return its (doc_id, data).
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        Raises ValueError for malformed entries so bad input is caught before any write.
+        """
+        if not isinstance(doc_info, dict):
+            raise ValueError(f"Document #{position} is not a JSON object")
         
-        return data
+        doc_id = doc_info.get('id')
+        if doc_id is not None and (not isinstance(doc_id, str) or not doc_id or '/' in doc_id):
+            raise ValueError(f"Document #{position} has an invalid ID: {doc_id!r}")
+        
+        doc_data = doc_info.get('data')
+        if not isinstance(doc_data, dict):
+            display_id = doc_id if doc_id else "auto-generated"
+            raise ValueError(f"Document #{position} ({display_id}) has no 'data' object")
+        
+        return doc_id, doc_data
+    
+    def _locate_collection_file(self, collection_name: str, import_dir: str) -> Path:
+        """Find a collection file and check it has a top-level 'sample_documents' key."""
+        json_file = self._find_collection_file(collection_name, import_dir)
+        
+        if not _has_sample_documents(json_file):
+            raise ValueError(f"Invalid collection data format in {json_file.name}")
+        
+        return json_file
+    
+    def _validate_collection_file(self, json_file: Path, validate_values: bool = True) -> Tuple[int, bool]:
+        """Validate every document in a collection file before anything is written.
+        
+        Returns the number of documents and whether any contains a serialized reference.
+        """
+        total_count = 0
+        has_refs = False
+        for position, doc_id, doc_data in self._iter_documents(json_file):
+            if validate_values:
+                try:
+                    has_refs = _validate_document_data(doc_data) or has_refs
+                except ValueError as e:
+                    display_id = doc_id if doc_id else "auto-generated"
+                    raise ValueError(f"Document #{position} ({display_id}) has invalid data: {e}") from e
+            total_count += 1
+        return total_count, has_refs
+    
+    def _iter_documents(self, json_file: Path) -> Iterator[Tuple[int, Optional[str], Dict[str, Any]]]:
+        """Stream (position, doc_id, data) for each sample document in a collection file.
+        
+        Documents without an explicit ID yield None as doc_id.
+        """
+        with _open_collection_file(json_file) as f:
+            for position, doc_info in enumerate(ijson.items(f, 'sample_documents.item', use_float=True), 1):
+                doc_id, doc_data = self._prepare_document(doc_info, position)
+                yield position, doc_id, doc_data
+    
+    def _prepare_batch(self, collection_ref: Any, documents: List[Tuple[Optional[str], Dict[str, Any]]],
+                       overwrite: bool,
+                       queued_paths: Set[str]) -> Tuple[List[Tuple[DocumentReference, Dict[str, Any]]], int, int]:
+        """Resolve document references for a batch and drop existing documents unless overwriting.
+        
+        queued_paths holds the paths already queued for writing earlier in the import;
+        unless overwriting, repeated IDs are skipped like existing documents and the
+        newly queued paths are added to it.
+        
+        Returns the writes to commit, the number of skipped documents, and the number
+        of documents whose existence check failed (counted as errors, not written).
+        """
+        # Documents without an explicit ID get an auto-generated one
+        make_ref = collection_ref.document
+        doc_refs = [make_ref(doc_id) if doc_id is not None else make_ref() for doc_id, _ in documents]
+        
+        existing_paths: Set[str] = set()
+        failed_paths: Set[str] = set()
+        if not overwrite:
+            existing_paths, failed_paths = self._get_existing_paths(
+                [doc_ref for doc_ref, (doc_id, _) in zip(doc_refs, documents) if doc_id is not None]
+            )
+        
+        opaque = collection_ref.id in self.opaque_collections
+        
+        pending_writes = []
+        skipped_count = 0
+        error_count = 0
+        for doc_ref, (_, doc_data) in zip(doc_refs, documents):
+            if doc_ref.path in failed_paths:
+                # Unknown whether it exists: don't risk overwriting it
+                error_count += 1
+                continue
+            if doc_ref.path in existing_paths:
+                log.debug("  ⏭️  Skipped existing document: %s", doc_ref.id)
+                skipped_count += 1
+                continue
+            if not overwrite:
+                # Existence was fetched before earlier copies were committed, so a repeated
+                # ID would otherwise overwrite the first copy
+                if doc_ref.path in queued_paths:
+                    log.debug("  ⏭️  Skipped duplicate document: %s", doc_ref.id)
+                    skipped_count += 1
+                    continue
+                queued_paths.add(doc_ref.path)
+            if opaque:
+                doc_data = {OPAQUE_FIELD: orjson.dumps(doc_data)}
+            pending_writes.append((doc_ref, doc_data))
+        
+        return pending_writes, skipped_count, error_count
     
     def import_collection(self, collection_name: str, import_dir: str = "firestore_import", 
-                         overwrite: bool = False) -> Dict[str, Any]:
-        """Import a single collection from JSON file."""
+                         overwrite: bool = False, imported_at: Optional[str] = None) -> Dict[str, Any]:
+        """Import a single collection from JSON file, streaming documents in write batches.
+        
+        imported_at defaults to the current time when not provided by the caller.
+        """
         print(f"📥 {'[DRY-RUN] ' if self.dry_run else ''}Importing collection: {collection_name}")
         
-        # Load collection data
-        collection_data = self.load_collection_data(collection_name, import_dir)
+        collection_ref = self.db.collection(collection_name)
         
-        if 'sample_documents' not in collection_data:
-            raise ValueError(f"Invalid collection data format in {collection_name}.json")
+        json_file = self._locate_collection_file(collection_name, import_dir)
         
-        documents = collection_data['sample_documents']
-        collection_ref = self.db.collection(collection_name)
+        # Pre-flight pass: validate every document before issuing any RPC, so
+        # malformed input fails fast instead of leaving a partial import behind.
+        # Opaque collections are stored as raw JSON bytes, so field rules don't apply
+        # and references are never converted.
+        opaque = collection_name in self.opaque_collections
+        total_count, has_refs = self._validate_collection_file(json_file, validate_values=not opaque)
         
         imported_count = 0
         skipped_count = 0
         error_count = 0
         
-        for doc_info in documents:
-            # Handle documents with or without explicit IDs
-            if 'id' in doc_info:
-                doc_id = doc_info['id']
-                use_auto_id = False
-            else:
-                doc_id = None  # Will use auto-generated ID
-                use_auto_id = True
-            
-            doc_data = self._deserialize_firestore_data(doc_info['data'])
+        # Documents read from the file but not yet checked for existence and committed
+        pending_docs: List[Tuple[Optional[str], Dict[str, Any]]] = []
+        # Paths already queued for writing in this import, to skip repeated IDs
+        queued_paths: Set[str] = set()
+        
+        # Full batches are committed in the background while the loop keeps reading.
+        # Firestore's 500/50/5 rule (start at 500 ops/s, grow 50% every 5 minutes) means
+        # even one 500-write batch in flight can be at the limit, so the default is a
+        # single worker; IMPORT_WORKERS raises concurrency once traffic has ramped up.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight: Set[Future] = set()
             
-            try:
-                if not self.dry_run:
-                    if use_auto_id:
-                        # Use auto-generated ID
-                        doc_ref = collection_ref.document()
-                        doc_id = doc_ref.id
-                        doc_ref.set(doc_data)
-                        imported_count += 1
-                        print(f"  ✅ Imported document with auto-generated ID: {doc_id}")
-                    else:
-                        # Use provided ID
-                        existing_doc = collection_ref.document(doc_id).get()
-                        
-                        if existing_doc.exists and not overwrite:
-                            print(f"  ⏭️  Skipped existing document: {doc_id}")
-                            skipped_count += 1
-                            continue
-                        
-                        collection_ref.document(doc_id).set(doc_data)
-                        imported_count += 1
-                        print(f"  ✅ Imported document: {doc_id}")
-                else:
-                    if use_auto_id:
-                        print(f"  🔍 [DRY-RUN] Would import document with auto-generated ID")
+            for _, doc_id, doc_data in self._iter_documents(json_file):
+                # Only walk documents when the file actually contains serialized references
+                if has_refs:
+                    self._deserialize_firestore_data(doc_data)
+                
+                if self.dry_run:
+                    if doc_id is not None:
+                        log.debug("  🔍 [DRY-RUN] Would import document: %s", doc_id)
                     else:
-                        print(f"  🔍 [DRY-RUN] Would import document: {doc_id}")
+                        log.debug("  🔍 [DRY-RUN] Would import document with auto-generated ID")
                     imported_count += 1
+                    if imported_count % PROGRESS_INTERVAL == 0:
+                        log.info("  📊 Progress: %d/%d documents", imported_count, total_count)
+                    continue
                 
-            except Exception as e:
-                display_id = doc_id if doc_id else "auto-generated"
-                print(f"  ❌ Error importing document {display_id}: {e}")
-                error_count += 1
+                pending_docs.append((doc_id, doc_data))
+                if len(pending_docs) < WRITE_BATCH_SIZE:
+                    continue
+                
+                pending_writes, skipped, failed = self._prepare_batch(collection_ref, pending_docs, overwrite, queued_paths)
+                skipped_count += skipped
+                error_count += failed
+                pending_docs = []
+                if pending_writes:
+                    in_flight.add(executor.submit(self._commit_batch, pending_writes))
+                
+                # Bound the number of batches held in memory while commits are outstanding
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        committed, failed = future.result()
+                        imported_count += committed
+                        error_count += failed
+                    log.info("  📊 Progress: %d/%d documents",
+                             imported_count + skipped_count + error_count, total_count)
+            
+            if pending_docs:
+                pending_writes, skipped, failed = self._prepare_batch(collection_ref, pending_docs, overwrite, queued_paths)
+                skipped_count += skipped
+                error_count += failed
+                if pending_writes:
+                    in_flight.add(executor.submit(self._commit_batch, pending_writes))
+            
+            for future in as_completed(in_flight):
+                committed, failed = future.result()
+                imported_count += committed
+                error_count += failed
+                log.info("  📊 Progress: %d/%d documents",
+                         imported_count + skipped_count + error_count, total_count)
         
         result = {
             'collection_name': collection_name,
-            'total_documents': len(documents),
+            'total_documents': total_count,
             'imported': imported_count,
             'skipped': skipped_count,
             'errors': error_count,
-            'imported_at': datetime.now().isoformat()
+            'imported_at': imported_at or datetime.now().isoformat()
         }
         
         print(f"✅ Collection {collection_name} import completed:")
@@ -219,9 +499,12 @@ class FirestoreImporter:
         """Import multiple selected collections."""
         print(f"🚀 {'[DRY-RUN] ' if self.dry_run else ''}Starting import of {len(collection_names)} collections")
         
+        # Single timestamp shared by every collection in this import
+        import_started_at = datetime.now().isoformat()
+        
         results = {
             'project_id': self.project_id,
-            'import_started_at': datetime.now().isoformat(),
+            'import_started_at': import_started_at,
             'dry_run': self.dry_run,
             'collections': {},
             'summary': {
@@ -237,7 +520,7 @@ class FirestoreImporter:
         
         for collection_name in collection_names:
             try:
-                result = self.import_collection(collection_name, import_dir, overwrite)
+                result = self.import_collection(collection_name, import_dir, overwrite, import_started_at)
                 results['collections'][collection_name] = result
                 results['summary']['successful_imports'] += 1
                 results['summary']['total_documents'] += result['total_documents']
@@ -249,7 +532,7 @@ class FirestoreImporter:
                 print(f"❌ Failed to import collection {collection_name}: {e}")
                 results['collections'][collection_name] = {
                     'error': str(e),
-                    'imported_at': datetime.now().isoformat()
+                    'imported_at': import_started_at
                 }
                 results['summary']['failed_imports'] += 1
         
@@ -262,8 +545,8 @@ class FirestoreImporter:
             reports_dir.mkdir(exist_ok=True)
             
             report_file = reports_dir / f"import_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            with open(report_file, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
             print(f"📋 Import report saved: {report_file}")
         
         return results
@@ -343,6 +626,24 @@ def confirm_import(selected_collections: List[str], project_id: str, dry_run: bo
             print("Please enter 'yes' or 'no'.")
 
 
+def configure_logging(level_name: str) -> None:
+    """Send this module's log messages to stdout at the given level.
+    
+    The root logger is left alone so LOG_LEVEL=DEBUG doesn't enable debug output
+    from google-auth, urllib3, grpc and other libraries.
+    """
+    level = logging.getLevelName(level_name.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {level_name}")
+    
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False
+
+
 def main():
     """Main function to run the importer."""
     print("📥 Mantra Finance Database Importer")
@@ -354,7 +655,22 @@ def main():
     IMPORT_DIR = os.getenv("IMPORT_DIR", "firestore_import")
     DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"
     DATABASE_NAME = os.getenv("FIREBASE_DATABASE_NAME", "(default)")
+    IMPORT_WORKERS = os.getenv("IMPORT_WORKERS", "1")
+    OPAQUE_COLLECTIONS = {name.strip() for name in os.getenv("OPAQUE_COLLECTIONS", "").split(",") if name.strip()}
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    
+    try:
+        configure_logging(LOG_LEVEL)
+    except ValueError:
+        print(f"❌ Error: Invalid LOG_LEVEL: {LOG_LEVEL}")
+        print("Please set it to one of: DEBUG, INFO, WARNING, ERROR")
+        sys.exit(1)
 
+    if not IMPORT_WORKERS.isdigit() or not 1 <= int(IMPORT_WORKERS) <= MAX_IMPORT_WORKERS:
+        print(f"❌ Error: Invalid IMPORT_WORKERS: {IMPORT_WORKERS}")
+        print(f"Please set it to a whole number between 1 and {MAX_IMPORT_WORKERS}")
+        sys.exit(1)
+    
     if not PROJECT_ID:
         print("❌ Error: FIREBASE_PROJECT_ID environment variable not set")
         print("Please set it to your target Firebase project ID:")
@@ -369,7 +685,8 @@ def main():
     
     try:
         # Initialize importer
-        importer = FirestoreImporter(SERVICE_ACCOUNT_PATH, PROJECT_ID, DRY_RUN, DATABASE_NAME)
+        importer = FirestoreImporter(SERVICE_ACCOUNT_PATH, PROJECT_ID, DRY_RUN, DATABASE_NAME, int(IMPORT_WORKERS),
+                                     OPAQUE_COLLECTIONS)
         
         # Get available collections
         available_collections = importer.get_available_collections(IMPORT_DIR)
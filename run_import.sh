@@ -65,7 +65,7 @@ if [ ! -d "$IMPORT_DIR" ]; then
 fi
 
 # Check if there are JSON files to import
-JSON_FILES=$(find "$IMPORT_DIR" -name "*.json" -not -name "complete_database_structure.json" | wc -l)
+JSON_FILES=$(find "$IMPORT_DIR" \( -name "*.json" -o -name "*.json.gz" \) -not -name "complete_database_structure.json*" -not -name "import_report_*" | wc -l)
 if [ "$JSON_FILES" -eq 0 ]; then
     echo "❌ Error: No JSON collection files found in $IMPORT_DIR/"
     echo ""